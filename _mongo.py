@@ -0,0 +1,54 @@
+"""
+Shared MongoDB connection for the migration scripts.
+The client is created on first use and reused, so running several
+migrations in one process pays the TLS/auth/discovery cost only once.
+
+Writing a new migration: express it as a single update_many rather than
+find() -> for -> update_one. Values that depend on the document itself go
+in a pipeline update (MongoDB 4.2+), e.g. migrate_split_lip_riv.py:
+
+    update_many({"upplýsingar.lip-riv": {"$exists": True}},
+                [{"$set": {"upplýsingar.sið lip": "$upplýsingar.lip-riv"}},
+                 {"$unset": "upplýsingar.lip-riv"}])
+
+For fields inside an array of sub-documents use the all-positional
+operator $[], or $[<id>] with array_filters to touch only some elements.
+Match documents with $elemMatch: {"lekar.styrkur": {"$exists": False}}
+would skip documents where only some elements lack the field.
+
+    update_many({"lekar": {"$elemMatch": {"styrkur": {"$exists": False}}}},
+                {"$set": {"lekar.$[l].styrkur": 1}},
+                array_filters=[{"l.styrkur": {"$exists": False}}])
+"""
+
+from pymongo import MongoClient, WriteConcern
+from config import MONGO_URI, DATABASE_NAME
+
+# Migrations are idempotent and re-runnable, so their writes skip the journal wait
+MIGRATION_WRITE_CONCERN = WriteConcern(w=1, j=False)
+
+_client = None
+
+def get_client():
+    """Return the shared client, connecting and pinging on first use"""
+    global _client
+    if _client is None:
+        _client = MongoClient(MONGO_URI, maxPoolSize=50)
+        # Fail fast and warm the pool before the first migration runs
+        _client.admin.command('ping')
+    return _client
+
+def get_db():
+    """Return the configured database on the shared client"""
+    return get_client()[DATABASE_NAME]
+
+def get_collection(name):
+    """Return a collection on the shared client with MIGRATION_WRITE_CONCERN"""
+    return get_db().get_collection(name, write_concern=MIGRATION_WRITE_CONCERN)
+
+def close_client():
+    """Close the shared client (it is recreated on the next get_client call)"""
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
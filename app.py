@@ -1,10 +1,17 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
-from pymongo import MongoClient
+from flask_caching import Cache
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime, date
 import os
+import uuid
+from urllib.parse import urlencode
+import orjson
 from marshmallow import Schema, fields, ValidationError, validates_schema
+from marshmallow.validate import OneOf, Range
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,6 +20,17 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
+# Read cache: Redis when REDIS_URL is set, disabled otherwise (a per-process
+# cache could not be invalidated across workers)
+REDIS_URL = os.getenv('REDIS_URL')
+cache = Cache(app, config={
+    'CACHE_TYPE': 'RedisCache' if REDIS_URL else 'NullCache',
+    'CACHE_REDIS_URL': REDIS_URL,
+    'CACHE_KEY_PREFIX': 'naeturbok:',
+})
+CACHE_TIMEOUT = 30  # seconds
+CACHE_GENERATION_KEY = 'generation'
+
 # MongoDB connection using environment variables
 MONGO_URI = os.getenv('MONGO_URI')
 DATABASE_NAME = os.getenv('DATABASE_NAME', 'naeturbok')
@@ -22,28 +40,57 @@ if not MONGO_URI:
     raise ValueError("MONGO_URI environment variable is required")
 
 try:
-    client = MongoClient(MONGO_URI)
+    # Pool sizes are per worker process: keep max_pool * workers under the
+    # Atlas connection limit. Do not start gunicorn with --preload, so every
+    # worker builds its own client after forking.
+    client = MongoClient(
+        MONGO_URI,
+        maxPoolSize=int(os.getenv('MONGO_MAX_POOL_SIZE', 50)),
+        minPoolSize=int(os.getenv('MONGO_MIN_POOL_SIZE', 5)),
+        maxIdleTimeMS=60000,
+        compressors='zstd,zlib',
+        serverSelectionTimeoutMS=3000,
+        socketTimeoutMS=10000,
+        retryWrites=True,
+    )
     db = client[DATABASE_NAME]
     collection = db[COLLECTION_NAME]
     postop_collection = db['postop']
     
     # Test connection
     client.admin.command('ping')
+
+    # Indexes: unique date enforces one record per day, postop matches the list sort
+    collection.create_index('date', unique=True)
+    collection.create_index('fjöldi leka')
+    postop_collection.create_index([('fecha', -1), ('hora', -1)])
     print(f"✅ Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
 except Exception as e:
     print(f"❌ Failed to connect to MongoDB: {e}")
     raise
 
+# Upper bound for ?limit= on list endpoints
+MAX_PAGE_SIZE = 500
+
+# Validators shared by several fields
+_ZERO_TO_THREE = OneOf((0, 1, 2, 3))
+_ZERO_TO_TWO = OneOf((0, 1, 2))
+_HALF_STEPS = OneOf((0, 0.5, 1, 1.5, 2, 3))
+_SCALE_10 = Range(min=0, max=10)
+
+# or-mp values that require mp-por
+_NUMERIC_MP = frozenset((0, 1, 2))
+
 # Schemas for validation
 class LekarSchema(Schema):
     tími = fields.Str(required=True)
     aðvarun = fields.Bool(load_default=False)
-    styrkur = fields.Int(validate=lambda x: x in [0, 1, 2, 3], load_default=1)
-    þörf = fields.Int(validate=lambda x: x in [0, 1, 2], load_default=0)
+    styrkur = fields.Int(validate=_ZERO_TO_THREE, load_default=1)
+    þörf = fields.Int(validate=_ZERO_TO_TWO, load_default=0)
 
 class LátSchema(Schema):
     tími = fields.Str(required=True)
-    flaedi = fields.Int(validate=lambda x: x in [0, 1, 2], load_default=0)
+    flaedi = fields.Int(validate=_ZERO_TO_TWO, load_default=0)
 
 class ÁfengiSchema(Schema):
     bjór = fields.Int(load_default=0)
@@ -51,7 +98,7 @@ class ÁfengiSchema(Schema):
     annar = fields.Int(load_default=0)
 
 class ÆfingSchema(Schema):
-    type = fields.Str(validate=lambda x: x in ['nej', 'Dir', 'Flor', 'labba', 'annað'], load_default='nej')
+    type = fields.Str(validate=OneOf(('nej', 'Dir', 'Flor', 'labba', 'annað')), load_default='nej')
     km = fields.Float(load_default=None, allow_none=True)
 
 class UpplýsingarSchema(Schema):
@@ -78,91 +125,248 @@ class RecordSchema(Schema):
     lát = fields.List(fields.Nested(LátSchema), load_default=[])
     athugasemd = fields.Str(load_default="")
     ready = fields.Bool(load_default=False)
-    frábært = fields.Int(validate=lambda x: x in [0, 1, 2, 3], load_default=0)
+    frábært = fields.Int(validate=_ZERO_TO_THREE, load_default=0)
 
 
 # PostOp collection schema (campos con guión se validan en load)
 class PostOpSchema(Schema):
     fecha = fields.Str(required=True)  # YYYY-MM-DD
     hora = fields.Str(required=True)   # HH:MM local
-    pos = fields.Str(validate=lambda x: x in ['depie', 'sentado'], required=True)
-    hec = fields.Int(validate=lambda x: x in [0, 1], load_default=0)
+    pos = fields.Str(validate=OneOf(('depie', 'sentado')), required=True)
+    hec = fields.Int(validate=OneOf((0, 1)), load_default=0)
     or_gan = fields.Float(
-        validate=lambda x: x in (0, 0.5, 1, 2),
+        validate=OneOf((0, 0.5, 1, 2)),
         load_default=0,
         data_key='or-gan',
     )
-    or_ur = fields.Int(validate=lambda x: x in [0, 1, 2], load_default=0, data_key='or-ur')
+    or_ur = fields.Int(validate=_ZERO_TO_TWO, load_default=0, data_key='or-ur')
     or_ch = fields.Float(
-        validate=lambda x: x in (0, 0.5, 1, 1.5, 2, 3),
+        validate=_HALF_STEPS,
         load_default=0,
         data_key='or-ch',
     )
     or_vol = fields.Float(
-        validate=lambda x: x in (0, 0.5, 1, 1.5, 2, 3),
+        validate=_HALF_STEPS,
         load_default=0,
         data_key='or-vol',
     )
     or_mp = fields.Raw(
-        validate=lambda x: x == 'no' or x in [0, 1, 2],
+        validate=OneOf(('no', 0, 1, 2)),
         load_default='no',
         data_key='or-mp',
     )
     or_mp_por = fields.Str(
-        validate=lambda x: x in ['tos', 'estornudo', 'esfuerzo', 'otro', 'nada'],
+        validate=OneOf(('tos', 'estornudo', 'esfuerzo', 'otro', 'nada')),
         load_default=None,
         allow_none=True,
         data_key='mp-por',
     )
-    or_mlk = fields.Int(validate=lambda x: 0 <= x <= 10, load_default=0, data_key='or-mlk')
-    or_spv = fields.Int(validate=lambda x: 0 <= x <= 10, load_default=0, data_key='or-spv')
-    dol = fields.Int(validate=lambda x: 0 <= x <= 5, load_default=0, data_key='dol')
+    or_mlk = fields.Int(validate=_SCALE_10, load_default=0, data_key='or-mlk')
+    or_spv = fields.Int(validate=_SCALE_10, load_default=0, data_key='or-spv')
+    dol = fields.Int(validate=Range(min=0, max=5), load_default=0, data_key='dol')
     ingesta = fields.Str(
-        validate=lambda x: x in ('', 'agua', 'agua con gas', 'cerveza', 'zumo', 'leche', 'otros'),
+        validate=OneOf(('', 'agua', 'agua con gas', 'cerveza', 'zumo', 'leche', 'otros')),
         load_default='',
         data_key='ingesta',
     )
     ingesta_cantidad = fields.Str(
-        validate=lambda x: x in ('', '100 ml', '200 ml', '300 ml', '400 ml', '500 ml', '600 ml', '700 ml', '800 ml', '900 ml', '1l'),
+        validate=OneOf(('', '100 ml', '200 ml', '300 ml', '400 ml', '500 ml', '600 ml', '700 ml', '800 ml', '900 ml', '1l')),
         load_default='',
         data_key='ingesta-cantidad',
     )
     medicacion = fields.Str(
-        validate=lambda x: x in ('', 'paracetamol 1mg', 'iboprufeno 600mg', 'antibiótico'),
+        validate=OneOf(('', 'paracetamol 1mg', 'iboprufeno 600mg', 'antibiótico')),
         load_default='',
         data_key='medicación',
     )
 
     @validates_schema
     def validate_mp_por(self, data, **kwargs):
-        or_mp = data.get('or_mp', 'no')
-        or_mp_por = data.get('or_mp_por')
-        if or_mp in (0, 1, 2) and not or_mp_por:
+        if data.get('or_mp') in _NUMERIC_MP and not data.get('or_mp_por'):
             raise ValidationError({'mp-por': ['mp-por es obligatorio cuando or-mp es 0, 1 o 2']})
 
+
+# Schemas are stateless on load(), so build them once and share across requests
+_record_schema = RecordSchema()
+_postop_schema = PostOpSchema()
+
+def dumps(obj):
+    """orjson.dumps that accepts non-str keys (marshmallow reports list item errors under ints)"""
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def ojsonify(obj):
+    """Drop-in for flask.jsonify that encodes with orjson"""
+    return app.response_class(dumps(obj), mimetype='application/json')
+
+
+def ojsonify_list(docs, serializer, **extra):
+    """Encode a cursor as {'success', 'data', 'count', **extra} one document at a time"""
+    chunks = list(map(dumps, map(serializer, docs)))
+    body = b'{"success":true,"data":[' + b','.join(chunks) + b'],"count":' + str(len(chunks)).encode()
+    for key, value in extra.items():
+        body += b',' + dumps(key) + b':' + dumps(value)
+    return app.response_class(body + b'}', mimetype='application/json')
+
+
+def parse_page_args():
+    """Read ?offset= and ?limit= (capped at MAX_PAGE_SIZE); limit None means no limit"""
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = request.args.get('limit', type=int)
+    if limit is not None and limit > 0:
+        return offset, min(limit, MAX_PAGE_SIZE)
+    return offset, None
+
+
+def paginate(cursor, offset, limit):
+    """Push offset/limit down to MongoDB on an already sorted cursor"""
+    if offset:
+        cursor = cursor.skip(offset)
+    if limit:
+        cursor = cursor.limit(limit)
+    return cursor
+
+
+def find_page_with_total(coll, query, sort, projection, offset, limit):
+    """Fetch one page and the total match count in a single $facet aggregation
+
+    The whole result comes back as one 16MB document, so callers must pass a
+    limit; the list endpoints reject ?count=1 without ?limit= rather than
+    silently capping a request that would be unbounded without count.
+    """
+    # $match/$sort stay outside $facet so they can use the indexes
+    page = []
+    if offset:
+        page.append({'$skip': offset})
+    page.append({'$limit': limit})
+    if projection:
+        page.append({'$project': projection})
+    pipeline = [
+        {'$match': query},
+        {'$sort': sort},
+        {'$facet': {'data': page, 'total': [{'$count': 'n'}]}},
+    ]
+    result = next(coll.aggregate(pipeline))
+    total = result['total'][0]['n'] if result['total'] else 0
+    return result['data'], total
+
+
+def parse_fields_arg():
+    """Build a MongoDB projection from a comma-separated ?fields= argument"""
+    fields_arg = request.args.get('fields')
+    if not fields_arg:
+        return None
+    return {name.strip(): 1 for name in fields_arg.split(',') if name.strip()}
+
+
+def is_cacheable(rv):
+    """Only cache plain 200 responses (errors are returned as tuples)"""
+    return getattr(rv, 'status_code', None) == 200
+
+
+def make_cache_key(*args, **kwargs):
+    """Key reads by generation, path and sorted query string
+
+    Bumping the generation orphans every older entry (they expire via
+    CACHE_TIMEOUT), so invalidation is one SET instead of a KEYS scan.
+    """
+    generation = cache.get(CACHE_GENERATION_KEY) or '0'
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f'{generation}:{request.path}?{query}'
+
+
+def invalidate_cache():
+    """Best-effort: the write is already committed, so never fail on Redis"""
+    try:
+        cache.set(CACHE_GENERATION_KEY, uuid.uuid4().hex, timeout=0)
+    except Exception:
+        app.logger.exception('Cache invalidation failed')
+
+
+def parse_object_id(value):
+    """Parse a route id once; returns None if it is not a valid ObjectId"""
+    try:
+        return ObjectId(value)
+    except InvalidId:
+        return None
+
+
+def load_json_body():
+    """Parse the request body with orjson (faster than request.get_json)"""
+    return orjson.loads(request.get_data(cache=False))
+
+
+# (schema attribute, stored key, default) for the optional PostOp fields
+_POSTOP_KEYMAP = (
+    ('hec', 'hec', 0),
+    ('or_gan', 'or-gan', 0),
+    ('or_ur', 'or-ur', 0),
+    ('or_ch', 'or-ch', 0),
+    ('or_vol', 'or-vol', 0),
+    ('or_mp', 'or-mp', 'no'),
+    ('or_mlk', 'or-mlk', 0),
+    ('or_spv', 'or-spv', 0),
+    ('dol', 'dol', 0),
+    ('ingesta', 'ingesta', ''),
+    ('ingesta_cantidad', 'ingesta-cantidad', ''),
+    ('medicacion', 'medicación', ''),
+)
+
+
+def _build_postop_payload(validated):
+    """Map validated PostOp data to the stored document (claves or-gan, or-ur, etc.)"""
+    payload = {'fecha': validated['fecha'], 'hora': validated['hora'], 'pos': validated['pos']}
+    for attr, key, default in _POSTOP_KEYMAP:
+        payload[key] = validated.get(attr, default)
+    if validated.get('or_mp') in _NUMERIC_MP and validated.get('or_mp_por'):
+        payload['mp-por'] = validated['or_mp_por']
+    return payload
+
+
+def _prepare_record(data):
+    """Validate a record body and shape it for storage"""
+    validated_data = _record_schema.load(data)
+    # Keep date as string for MongoDB storage (fields.Date already parsed it)
+    validated_data['date'] = validated_data['date'].isoformat()
+    # Add calculated field
+    validated_data['fjöldi leka'] = len(validated_data.get('lekar', []))
+    return validated_data
+
+
+def _prepare_postop(data):
+    """Validate a PostOp body and shape it for storage"""
+    return _build_postop_payload(_postop_schema.load(data))
+
+
 def serialize_record(record):
     """Convert ObjectId to string for JSON serialization"""
     if record:
         record['_id'] = str(record['_id'])
-        # Handle date field - keep as string for consistency
-        if 'date' in record:
-            if isinstance(record['date'], date):
-                record['date'] = record['date'].strftime('%Y-%m-%d')
-            elif isinstance(record['date'], datetime):
-                record['date'] = record['date'].strftime('%Y-%m-%d')
-        # Calculate fjöldi leka
-        record['fjöldi leka'] = len(record.get('lekar', []))
+        # Dates are stored as strings; only legacy date/datetime values need formatting
+        record_date = record.get('date')
+        if type(record_date) is date or type(record_date) is datetime:
+            record['date'] = record_date.isoformat()[:10]
+        # fjöldi leka is stored on write; only compute it for legacy records
+        if 'fjöldi leka' not in record:
+            record['fjöldi leka'] = len(record.get('lekar', ()))
     return record
 
 
 def serialize_postop(doc):
     """Convert ObjectId to string for JSON serialization (postop)"""
     if doc:
-        doc = dict(doc)
         doc['_id'] = str(doc['_id'])
     return doc
 
+@app.before_request
+def short_circuit_preflight():
+    """Answer CORS preflights without dispatching to a view (flask_cors adds the headers)"""
+    # Unknown paths keep falling through to the normal 404
+    if request.method == 'OPTIONS' and request.url_rule is not None:
+        return '', 204
+
 @app.route('/api/records', methods=['GET'])
+@cache.cached(timeout=CACHE_TIMEOUT, make_cache_key=make_cache_key, response_filter=is_cacheable)
 def get_records():
     """Get all records, optionally filtered by date range"""
     try:
@@ -178,152 +382,144 @@ def get_records():
                 date_query['$lte'] = end_date
             query['date'] = date_query
         
-        records = list(collection.find(query).sort('date', -1))
-        serialized_records = [serialize_record(record) for record in records]
+        projection = parse_fields_arg()
+        if projection:
+            # Legacy records lack fjöldi leka; derive it server-side so lekar
+            # itself is only returned when it was asked for
+            projection['fjöldi leka'] = {'$ifNull': ['$fjöldi leka', {'$size': {'$ifNull': ['$lekar', []]}}]}
         
-        return jsonify({
-            'success': True,
-            'data': serialized_records,
-            'count': len(serialized_records)
-        })
+        offset, limit = parse_page_args()
+        if request.args.get('count') == '1':
+            if limit is None:
+                return ojsonify({'success': False, 'error': 'count=1 requires limit'}), 400
+            records, total = find_page_with_total(collection, query, {'date': -1}, projection, offset, limit)
+            return ojsonify_list(records, serialize_record, total=total)
+        
+        records = paginate(collection.find(query, projection).sort('date', -1), offset, limit).batch_size(200)
+        
+        return ojsonify_list(records, serialize_record)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/records/<record_id>', methods=['GET'])
+@cache.cached(timeout=CACHE_TIMEOUT, make_cache_key=make_cache_key, response_filter=is_cacheable)
 def get_record(record_id):
     """Get a specific record by ID"""
     try:
-        if not ObjectId.is_valid(record_id):
-            return jsonify({'success': False, 'error': 'Invalid record ID'}), 400
+        oid = parse_object_id(record_id)
+        if oid is None:
+            return ojsonify({'success': False, 'error': 'Invalid record ID'}), 400
         
-        record = collection.find_one({'_id': ObjectId(record_id)})
+        record = collection.find_one({'_id': oid})
         if not record:
-            return jsonify({'success': False, 'error': 'Record not found'}), 404
+            return ojsonify({'success': False, 'error': 'Record not found'}), 404
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'data': serialize_record(record)
         })
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/records', methods=['POST'])
 def create_record():
     """Create a new record"""
     try:
-        data = request.get_json()
+        data = load_json_body()
         
-        # Validate data
-        schema = RecordSchema()
-        validated_data = schema.load(data)
+        validated_data = _prepare_record(data)
         
-        # Keep date as string for MongoDB storage
-        if isinstance(validated_data['date'], date):
-            validated_data['date'] = validated_data['date'].strftime('%Y-%m-%d')
-        elif isinstance(validated_data['date'], str):
-            # Validate date format
-            try:
-                datetime.strptime(validated_data['date'], '%Y-%m-%d')
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-        
-        # Check if record for this date already exists
-        existing = collection.find_one({'date': validated_data['date']})
-        if existing:
-            return jsonify({
+        # Insert record (the unique index on date rejects duplicates)
+        try:
+            result = collection.insert_one(validated_data)
+        except DuplicateKeyError:
+            return ojsonify({
                 'success': False, 
                 'error': 'Record for this date already exists'
             }), 400
         
-        # Add calculated field
-        validated_data['fjöldi leka'] = len(validated_data.get('lekar', []))
-        
-        # Insert record
-        result = collection.insert_one(validated_data)
+        # Writes are committed; stale reads expire within CACHE_TIMEOUT at worst
+        invalidate_cache()
         
-        # Return created record
-        created_record = collection.find_one({'_id': result.inserted_id})
+        # Return created record without reading it back
+        validated_data['_id'] = result.inserted_id
         
-        return jsonify({
+        return ojsonify({
             'success': True,
-            'data': serialize_record(created_record)
+            'data': serialize_record(validated_data)
         }), 201
         
     except ValidationError as e:
-        return jsonify({'success': False, 'error': e.messages}), 400
+        return ojsonify({'success': False, 'error': e.messages}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/records/<record_id>', methods=['PUT'])
 def update_record(record_id):
     """Update an existing record"""
     try:
-        if not ObjectId.is_valid(record_id):
-            return jsonify({'success': False, 'error': 'Invalid record ID'}), 400
-        
-        data = request.get_json()
+        oid = parse_object_id(record_id)
+        if oid is None:
+            return ojsonify({'success': False, 'error': 'Invalid record ID'}), 400
         
-        # Validate data
-        schema = RecordSchema()
-        validated_data = schema.load(data)
+        data = load_json_body()
         
-        # Keep date as string for MongoDB storage
-        if isinstance(validated_data['date'], date):
-            validated_data['date'] = validated_data['date'].strftime('%Y-%m-%d')
-        elif isinstance(validated_data['date'], str):
-            # Validate date format
-            try:
-                datetime.strptime(validated_data['date'], '%Y-%m-%d')
-            except ValueError:
-                return jsonify({'success': False, 'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        validated_data = _prepare_record(data)
         
-        # Add calculated field
-        validated_data['fjöldi leka'] = len(validated_data.get('lekar', []))
-        
-        # Update record
-        result = collection.update_one(
-            {'_id': ObjectId(record_id)},
-            {'$set': validated_data}
-        )
+        # Update record and get the stored document back in the same roundtrip
+        try:
+            updated_record = collection.find_one_and_update(
+                {'_id': oid},
+                {'$set': validated_data},
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return ojsonify({
+                'success': False,
+                'error': 'Record for this date already exists'
+            }), 400
         
-        if result.matched_count == 0:
-            return jsonify({'success': False, 'error': 'Record not found'}), 404
+        if updated_record is None:
+            return ojsonify({'success': False, 'error': 'Record not found'}), 404
         
-        # Return updated record
-        updated_record = collection.find_one({'_id': ObjectId(record_id)})
+        invalidate_cache()
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'data': serialize_record(updated_record)
         })
         
     except ValidationError as e:
-        return jsonify({'success': False, 'error': e.messages}), 400
+        return ojsonify({'success': False, 'error': e.messages}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/records/<record_id>', methods=['DELETE'])
 def delete_record(record_id):
     """Delete a record"""
     try:
-        if not ObjectId.is_valid(record_id):
-            return jsonify({'success': False, 'error': 'Invalid record ID'}), 400
+        oid = parse_object_id(record_id)
+        if oid is None:
+            return ojsonify({'success': False, 'error': 'Invalid record ID'}), 400
         
-        result = collection.delete_one({'_id': ObjectId(record_id)})
+        result = collection.delete_one({'_id': oid})
         
         if result.deleted_count == 0:
-            return jsonify({'success': False, 'error': 'Record not found'}), 404
+            return ojsonify({'success': False, 'error': 'Record not found'}), 404
+        
+        invalidate_cache()
         
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': 'Record deleted successfully'
         })
         
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 # --- PostOp API ---
 @app.route('/api/postop', methods=['GET'])
+@cache.cached(timeout=CACHE_TIMEOUT, make_cache_key=make_cache_key, response_filter=is_cacheable)
 def get_postop_list():
     """List postop records, optionally filtered by date range"""
     try:
@@ -337,103 +533,80 @@ def get_postop_list():
             if end_date:
                 date_query['$lte'] = end_date
             query['fecha'] = date_query
-        docs = list(postop_collection.find(query).sort([('fecha', -1), ('hora', -1)]))
-        serialized = [serialize_postop(d) for d in docs]
-        return jsonify({'success': True, 'data': serialized, 'count': len(serialized)})
+        projection = parse_fields_arg()
+        offset, limit = parse_page_args()
+        if request.args.get('count') == '1':
+            if limit is None:
+                return ojsonify({'success': False, 'error': 'count=1 requires limit'}), 400
+            docs, total = find_page_with_total(
+                postop_collection, query, {'fecha': -1, 'hora': -1}, projection, offset, limit
+            )
+            return ojsonify_list(docs, serialize_postop, total=total)
+        docs = paginate(
+            postop_collection.find(query, projection).sort([('fecha', -1), ('hora', -1)]),
+            offset,
+            limit,
+        ).batch_size(200)
+        return ojsonify_list(docs, serialize_postop)
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/postop', methods=['POST'])
 def create_postop():
     """Create a new postop record"""
     try:
-        data = request.get_json()
-        schema = PostOpSchema()
-        validated = schema.load(data)
-        # Guardar con claves or-gan, or-ur, etc.
-        payload = {
-            'fecha': validated['fecha'],
-            'hora': validated['hora'],
-            'pos': validated['pos'],
-            'hec': validated.get('hec', 0),
-            'or-gan': validated.get('or_gan', 0),
-            'or-ur': validated.get('or_ur', 0),
-            'or-ch': validated.get('or_ch', 0),
-            'or-vol': validated.get('or_vol', 0),
-            'or-mp': validated.get('or_mp', 'no'),
-            'or-mlk': validated.get('or_mlk', 0),
-            'or-spv': validated.get('or_spv', 0),
-            'dol': validated.get('dol', 0),
-            'ingesta': validated.get('ingesta', ''),
-            'ingesta-cantidad': validated.get('ingesta_cantidad', ''),
-            'medicación': validated.get('medicacion', ''),
-        }
-        if validated.get('or_mp') in (0, 1, 2) and validated.get('or_mp_por'):
-            payload['mp-por'] = validated['or_mp_por']
+        data = load_json_body()
+        payload = _prepare_postop(data)
         result = postop_collection.insert_one(payload)
-        created = postop_collection.find_one({'_id': result.inserted_id})
-        return jsonify({'success': True, 'data': serialize_postop(created)}), 201
+        invalidate_cache()
+        payload['_id'] = result.inserted_id
+        return ojsonify({'success': True, 'data': serialize_postop(payload)}), 201
     except ValidationError as e:
-        return jsonify({'success': False, 'error': e.messages}), 400
+        return ojsonify({'success': False, 'error': e.messages}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/postop/<postop_id>', methods=['PUT'])
 def update_postop(postop_id):
     """Update an existing postop record"""
     try:
-        if not ObjectId.is_valid(postop_id):
-            return jsonify({'success': False, 'error': 'Invalid record ID'}), 400
-        data = request.get_json()
-        schema = PostOpSchema()
-        validated = schema.load(data)
-        payload = {
-            'fecha': validated['fecha'],
-            'hora': validated['hora'],
-            'pos': validated['pos'],
-            'hec': validated.get('hec', 0),
-            'or-gan': validated.get('or_gan', 0),
-            'or-ur': validated.get('or_ur', 0),
-            'or-ch': validated.get('or_ch', 0),
-            'or-vol': validated.get('or_vol', 0),
-            'or-mp': validated.get('or_mp', 'no'),
-            'or-mlk': validated.get('or_mlk', 0),
-            'or-spv': validated.get('or_spv', 0),
-            'dol': validated.get('dol', 0),
-            'ingesta': validated.get('ingesta', ''),
-            'ingesta-cantidad': validated.get('ingesta_cantidad', ''),
-            'medicación': validated.get('medicacion', ''),
-        }
-        if validated.get('or_mp') in (0, 1, 2) and validated.get('or_mp_por'):
-            payload['mp-por'] = validated['or_mp_por']
+        oid = parse_object_id(postop_id)
+        if oid is None:
+            return ojsonify({'success': False, 'error': 'Invalid record ID'}), 400
+        data = load_json_body()
+        payload = _prepare_postop(data)
         update_op = {'$set': payload}
-        if validated.get('or_mp') == 'no':
+        if payload['or-mp'] == 'no':
             update_op['$unset'] = {'mp-por': ''}
-        result = postop_collection.update_one({'_id': ObjectId(postop_id)}, update_op)
-        if result.matched_count == 0:
-            return jsonify({'success': False, 'error': 'Record not found'}), 404
-        updated = postop_collection.find_one({'_id': ObjectId(postop_id)})
-        return jsonify({'success': True, 'data': serialize_postop(updated)})
+        updated = postop_collection.find_one_and_update(
+            {'_id': oid}, update_op, return_document=ReturnDocument.AFTER
+        )
+        if updated is None:
+            return ojsonify({'success': False, 'error': 'Record not found'}), 404
+        invalidate_cache()
+        return ojsonify({'success': True, 'data': serialize_postop(updated)})
     except ValidationError as e:
-        return jsonify({'success': False, 'error': e.messages}), 400
+        return ojsonify({'success': False, 'error': e.messages}), 400
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/postop/<postop_id>', methods=['DELETE'])
 def delete_postop(postop_id):
     """Delete a postop record"""
     try:
-        if not ObjectId.is_valid(postop_id):
-            return jsonify({'success': False, 'error': 'Invalid record ID'}), 400
-        result = postop_collection.delete_one({'_id': ObjectId(postop_id)})
+        oid = parse_object_id(postop_id)
+        if oid is None:
+            return ojsonify({'success': False, 'error': 'Invalid record ID'}), 400
+        result = postop_collection.delete_one({'_id': oid})
         if result.deleted_count == 0:
-            return jsonify({'success': False, 'error': 'Record not found'}), 404
-        return jsonify({'success': True, 'message': 'Record deleted successfully'})
+            return ojsonify({'success': False, 'error': 'Record not found'}), 404
+        invalidate_cache()
+        return ojsonify({'success': True, 'message': 'Record deleted successfully'})
     except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+        return ojsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/api/health', methods=['GET'])
@@ -442,23 +615,23 @@ def health_check():
     try:
         # Test database connection
         client.admin.command('ping')
-        return jsonify({
+        return ojsonify({
             'success': True,
             'message': 'API is healthy',
             'database': 'connected',
             'cors_origin': request.headers.get('Origin', 'No origin header')
         })
     except Exception as e:
-        return jsonify({
+        return ojsonify({
             'success': False,
             'message': 'Database connection failed',
             'error': str(e)
         }), 500
 
-@app.route('/api/test-cors', methods=['GET', 'OPTIONS'])
+@app.route('/api/test-cors', methods=['GET'])
 def test_cors():
     """Test endpoint for CORS debugging"""
-    return jsonify({
+    return ojsonify({
         'message': 'CORS test successful',
         'origin': request.headers.get('Origin', 'No origin'),
         'method': request.method,
@@ -466,4 +639,8 @@ def test_cors():
     })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Development server only; in production run `gunicorn app:app` (see gunicorn.conf.py)
+    if os.getenv('FLASK_ENV') == 'development':
+        app.run(debug=True, host='0.0.0.0', port=5000)
+    else:
+        print("Use `gunicorn app:app` to serve the API, or set FLASK_ENV=development")
\ No newline at end of file
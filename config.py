@@ -0,0 +1,18 @@
+"""
+Connection settings for the migration scripts, read from the environment
+(and .env) once per process.
+"""
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# MongoDB connection using environment variables
+MONGO_URI = os.getenv('MONGO_URI')
+DATABASE_NAME = os.getenv('DATABASE_NAME', 'naeturbok')
+COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'naetur')
+
+if not MONGO_URI:
+    raise ValueError("MONGO_URI environment variable is required")
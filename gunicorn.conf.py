@@ -0,0 +1,9 @@
+# Gunicorn settings, picked up automatically by `gunicorn app:app`
+import os
+
+worker_class = 'gevent'
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+worker_connections = 100
+
+# Load the app after forking so every worker opens its own MongoClient pool
+preload_app = False
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Migration script to store 'fjöldi leka' on records that predate it
+- 'fjöldi leka' is set to the number of entries in 'lekar'
+"""
+
+from config import DATABASE_NAME, COLLECTION_NAME
+from _mongo import get_collection
+
+def main():
+    try:
+        # Connect to MongoDB (shared client, see _mongo.py)
+        collection = get_collection(COLLECTION_NAME)
+        print(f"[OK] Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
+
+        # Compute the count server-side from the lekar array
+        result = collection.update_many(
+            {"fjöldi leka": {"$exists": False}},
+            [{"$set": {"fjöldi leka": {"$size": {"$ifNull": ["$lekar", []]}}}}]
+        )
+
+        if result.modified_count > 0:
+            print(f"[OK] Successfully updated {result.modified_count} records")
+            print(f"Migration completed successfully!")
+        else:
+            print("All records already have the 'fjöldi leka' field. No migration needed.")
+
+    except Exception as e:
+        print(f"[ERROR] Migration failed: {e}")
+        raise
+
+if __name__ == "__main__":
+    main()
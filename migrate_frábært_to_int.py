@@ -5,69 +5,52 @@ Migration script to convert 'frábært' field from boolean to integer
 - true -> 1
 """
 
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection using environment variables
-MONGO_URI = os.getenv('MONGO_URI')
-DATABASE_NAME = os.getenv('DATABASE_NAME', 'naeturbok')
-COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'naetur')
-
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable is required")
+from config import DATABASE_NAME, COLLECTION_NAME
+from _mongo import get_collection
+
+def count_frábært_values(collection):
+    """
+    Count records per 'frábært' value with a single $group pass.
+    Keys are (is_boolean, value) so that true/false stay apart from 1/0,
+    which compare equal as Python dict keys.
+    """
+    counts = {}
+    pipeline = [{"$group": {
+        "_id": {"bool": {"$eq": [{"$type": "$frábært"}, "bool"]}, "value": "$frábært"},
+        "n": {"$sum": 1}
+    }}]
+    for doc in collection.aggregate(pipeline):
+        key = (doc["_id"]["bool"], doc["_id"].get("value"))
+        counts[key] = counts.get(key, 0) + doc["n"]
+    return counts
 
 def main():
     try:
-        # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client[DATABASE_NAME]
-        collection = db[COLLECTION_NAME]
-
-        # Test connection
-        client.admin.command('ping')
+        # Connect to MongoDB (shared client, see _mongo.py)
+        collection = get_collection(COLLECTION_NAME)
         print(f"[OK] Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
 
-        # Find records with boolean frábært field
-        records_with_false = collection.count_documents({"frábært": False})
-        records_with_true = collection.count_documents({"frábært": True})
-
-        print(f"Found {records_with_false} records with frábært: false")
-        print(f"Found {records_with_true} records with frábært: true")
-
-        total_to_migrate = records_with_false + records_with_true
-
-        if total_to_migrate > 0:
-            # Convert false to 0
-            if records_with_false > 0:
-                result_false = collection.update_many(
-                    {"frábært": False},
-                    {"$set": {"frábært": 0}}
-                )
-                print(f"[OK] Converted {result_false.modified_count} records from false to 0")
-
-            # Convert true to 1
-            if records_with_true > 0:
-                result_true = collection.update_many(
-                    {"frábært": True},
-                    {"$set": {"frábært": 1}}
-                )
-                print(f"[OK] Converted {result_true.modified_count} records from true to 1")
+        # Convert false -> 0 and true -> 1 in a single server-side pass
+        result = collection.update_many(
+            {"frábært": {"$type": "bool"}},
+            [{"$set": {"frábært": {"$cond": [{"$eq": ["$frábært", True]}, 1, 0]}}}]
+        )
 
+        if result.matched_count > 0:
+            print(f"Found {result.matched_count} records with boolean frábært")
+            print(f"[OK] Converted {result.modified_count} boolean records to 0/1")
             print(f"Migration completed successfully!")
         else:
             print("All records already have integer 'frábært' field. No migration needed.")
 
         # Verify the migration
-        total_records = collection.count_documents({})
-        records_with_0 = collection.count_documents({"frábært": 0})
-        records_with_1 = collection.count_documents({"frábært": 1})
-        records_with_2 = collection.count_documents({"frábært": 2})
-        records_with_3 = collection.count_documents({"frábært": 3})
-        records_with_boolean = collection.count_documents({"frábært": {"$in": [True, False]}})
+        total_records = collection.estimated_document_count()
+        counts = count_frábært_values(collection)
+        records_with_0 = counts.get((False, 0), 0)
+        records_with_1 = counts.get((False, 1), 0)
+        records_with_2 = counts.get((False, 2), 0)
+        records_with_3 = counts.get((False, 3), 0)
+        records_with_boolean = counts.get((True, True), 0) + counts.get((True, False), 0)
 
         print(f"\nVerification:")
         print(f"Total records: {total_records}")
@@ -85,9 +68,6 @@ def main():
     except Exception as e:
         print(f"[ERROR] Migration failed: {e}")
         raise
-    finally:
-        if 'client' in locals():
-            client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
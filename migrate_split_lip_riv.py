@@ -6,106 +6,105 @@ Migration script to split 'lip-riv' field into 'sið lip' and 'sið-riv' fields
 - Remove old 'lip-riv' field
 """
 
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection using environment variables
-MONGO_URI = os.getenv('MONGO_URI')
-DATABASE_NAME = os.getenv('DATABASE_NAME', 'naeturbok')
-COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'naetur')
-
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable is required")
-
-def main():
-    try:
-        # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client[DATABASE_NAME]
-        collection = db[COLLECTION_NAME]
-
-        # Test connection
-        client.admin.command('ping')
-        print(f"[OK] Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
-
-        # Find records that have the old 'lip-riv' field
-        records_with_old_field = list(collection.find({"upplýsingar.lip-riv": {"$exists": True}}))
-        print(f"Found {len(records_with_old_field)} records with 'upplýsingar.lip-riv' field")
-
-        # Find records that already have new fields
-        records_with_new_fields = collection.count_documents({
-            "$or": [
-                {"upplýsingar.sið lip": {"$exists": True}},
-                {"upplýsingar.sið-riv": {"$exists": True}}
-            ]
-        })
-        print(f"Found {records_with_new_fields} records that already have new fields")
-
-        if len(records_with_old_field) > 0:
-            # Process each record individually
-            updated_count = 0
-            for record in records_with_old_field:
-                old_lip_riv_value = record.get('upplýsingar', {}).get('lip-riv', '')
-
-                # Create update operations
-                update_ops = {
+from pymongo import UpdateOne
+from config import DATABASE_NAME, COLLECTION_NAME
+from _mongo import get_collection
+
+# Updates sent per bulk_write in the per-record fallback
+BATCH_SIZE = 500
+
+# Constant part of every per-record fallback update, shared across operations
+UNSET_LIP_RIV = {"upplýsingar.lip-riv": ""}
+
+def split_per_record(collection):
+    """Fallback for MongoDB < 4.2 (no pipeline updates): batched unordered bulk_write"""
+    modified_count = 0
+    ops = []
+    # Stream the cursor so writes start after the first batch; $project
+    # flattens lip-riv into 'v' server-side so each record is a flat dict
+    with collection.aggregate(
+        [
+            {"$match": {"upplýsingar.lip-riv": {"$exists": True}}},
+            {"$project": {"_id": 1, "v": "$upplýsingar.lip-riv"}}
+        ],
+        batchSize=1000
+    ) as cursor:
+        for record in cursor:
+            ops.append(UpdateOne(
+                {"_id": record["_id"]},
+                {
                     "$set": {
-                        "upplýsingar.sið lip": old_lip_riv_value,
+                        "upplýsingar.sið lip": record["v"],
                         "upplýsingar.sið-riv": "--:--"
                     },
-                    "$unset": {
-                        "upplýsingar.lip-riv": ""
-                    }
+                    "$unset": UNSET_LIP_RIV
                 }
+            ))
+            if len(ops) >= BATCH_SIZE:
+                modified_count += collection.bulk_write(ops, ordered=False).modified_count
+                ops = []
+    if ops:
+        modified_count += collection.bulk_write(ops, ordered=False).modified_count
+    return modified_count
 
-                # Update the record
-                result = collection.update_one(
-                    {"_id": record["_id"]},
-                    update_ops
-                )
+def main():
+    try:
+        # Connect to MongoDB (shared client, see _mongo.py)
+        collection = get_collection(COLLECTION_NAME)
+        print(f"[OK] Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
 
-                if result.modified_count > 0:
-                    updated_count += 1
+        if collection.database.client.server_info()["versionArray"] >= [4, 2]:
+            # Copy 'lip-riv' into 'sið lip' and drop it server-side in one
+            # pipeline update instead of one update_one per record
+            migrated_count = collection.update_many(
+                {"upplýsingar.lip-riv": {"$exists": True}},
+                [
+                    {"$set": {
+                        "upplýsingar.sið lip": "$upplýsingar.lip-riv",
+                        "upplýsingar.sið-riv": "--:--"
+                    }},
+                    {"$unset": "upplýsingar.lip-riv"}
+                ]
+            ).modified_count
+        else:
+            migrated_count = split_per_record(collection)
 
-            print(f"[OK] Successfully migrated {updated_count} records")
+        if migrated_count > 0:
+            print(f"[OK] Successfully migrated {migrated_count} records")
             print(f"Migration completed successfully!")
         else:
             print("No records with old 'lip-riv' field found. Migration may have already been completed.")
 
         # Add new fields to records that don't have them yet
-        records_without_new_fields = collection.count_documents({
-            "$and": [
-                {"upplýsingar.sið lip": {"$exists": False}},
-                {"upplýsingar.sið-riv": {"$exists": False}}
-            ]
-        })
-
-        if records_without_new_fields > 0:
-            result = collection.update_many(
-                {
-                    "$and": [
-                        {"upplýsingar.sið lip": {"$exists": False}},
-                        {"upplýsingar.sið-riv": {"$exists": False}}
-                    ]
-                },
-                {
-                    "$set": {
-                        "upplýsingar.sið lip": "",
-                        "upplýsingar.sið-riv": "--:--"
-                    }
+        result = collection.update_many(
+            {
+                "$and": [
+                    {"upplýsingar.sið lip": {"$exists": False}},
+                    {"upplýsingar.sið-riv": {"$exists": False}}
+                ]
+            },
+            {
+                "$set": {
+                    "upplýsingar.sið lip": "",
+                    "upplýsingar.sið-riv": "--:--"
                 }
-            )
+            }
+        )
+        if result.modified_count > 0:
             print(f"[OK] Added new fields to {result.modified_count} additional records")
 
-        # Verify the migration
-        total_records = collection.count_documents({})
-        records_with_sið_lip = collection.count_documents({"upplýsingar.sið lip": {"$exists": True}})
-        records_with_sið_riv = collection.count_documents({"upplýsingar.sið-riv": {"$exists": True}})
-        records_with_old_field = collection.count_documents({"upplýsingar.lip-riv": {"$exists": True}})
+        # Verify the migration: all four counts in one pass over the collection
+        facets = next(collection.aggregate([{"$facet": {
+            "total": [{"$count": "n"}],
+            "sið_lip": [{"$match": {"upplýsingar.sið lip": {"$exists": True}}}, {"$count": "n"}],
+            "sið_riv": [{"$match": {"upplýsingar.sið-riv": {"$exists": True}}}, {"$count": "n"}],
+            "old_field": [{"$match": {"upplýsingar.lip-riv": {"$exists": True}}}, {"$count": "n"}]
+        }}]))
+        counts = {name: rows[0]["n"] if rows else 0 for name, rows in facets.items()}
+        total_records = counts["total"]
+        records_with_sið_lip = counts["sið_lip"]
+        records_with_sið_riv = counts["sið_riv"]
+        records_with_old_field = counts["old_field"]
 
         print(f"\nVerification:")
         print(f"Total records: {total_records}")
@@ -123,9 +122,6 @@ def main():
     except Exception as e:
         print(f"[ERROR] Migration failed: {e}")
         raise
-    finally:
-        if 'client' in locals():
-            client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,43 +3,23 @@
 Migration script to add 'tamsul' field to upplýsingar in existing records with default value False
 """
 
-from pymongo import MongoClient
-import os
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# MongoDB connection using environment variables
-MONGO_URI = os.getenv('MONGO_URI')
-DATABASE_NAME = os.getenv('DATABASE_NAME', 'naeturbok')
-COLLECTION_NAME = os.getenv('COLLECTION_NAME', 'naetur')
-
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable is required")
+from config import DATABASE_NAME, COLLECTION_NAME
+from _mongo import get_collection
 
 def main():
     try:
-        # Connect to MongoDB
-        client = MongoClient(MONGO_URI)
-        db = client[DATABASE_NAME]
-        collection = db[COLLECTION_NAME]
-
-        # Test connection
-        client.admin.command('ping')
+        # Connect to MongoDB (shared client, see _mongo.py)
+        collection = get_collection(COLLECTION_NAME)
         print(f"[OK] Connected to MongoDB Atlas - Database: {DATABASE_NAME}, Collection: {COLLECTION_NAME}")
 
-        # Find records that don't have the 'tamsul' field in upplýsingar
-        records_without_field = collection.count_documents({"upplýsingar.tamsul": {"$exists": False}})
-        print(f"Found {records_without_field} records without 'upplýsingar.tamsul' field")
-
-        if records_without_field > 0:
-            # Add 'tamsul' field with default value False to all records that don't have it
-            result = collection.update_many(
-                {"upplýsingar.tamsul": {"$exists": False}},
-                {"$set": {"upplýsingar.tamsul": False}}
-            )
+        # Add 'tamsul' field with default value False to all records that don't have it
+        result = collection.update_many(
+            {"upplýsingar.tamsul": {"$exists": False}},
+            {"$set": {"upplýsingar.tamsul": False}}
+        )
 
+        if result.matched_count > 0:
+            print(f"Found {result.matched_count} records without 'upplýsingar.tamsul' field")
             print(f"[OK] Successfully updated {result.modified_count} records")
             print(f"Migration completed successfully!")
         else:
@@ -61,9 +41,6 @@ def main():
     except Exception as e:
         print(f"[ERROR] Migration failed: {e}")
         raise
-    finally:
-        if 'client' in locals():
-            client.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Run every migration over one shared MongoDB connection (see _mongo.py).
+Independent migrations run concurrently; each migration is idempotent,
+so re-running is safe. Output from concurrent migrations may interleave.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from _mongo import get_client, close_client
+from migrate_frábært import main as frábært_main
+from migrate_frábært_to_int import main as frábært_to_int_main
+from migrate_tamsul import main as tamsul_main
+from migrate_split_lip_riv import main as split_lip_riv_main
+from migrate_fjöldi_leka import main as fjöldi_leka_main
+from migrate_postop_dol import main as postop_dol_main
+from migrate_postop_mp import main as postop_mp_main
+
+# Migrations within a chain run in order; chains are independent of each other
+MIGRATION_CHAINS = [
+    [frábært_main, frábært_to_int_main],  # frábært must exist before it is converted
+    [tamsul_main],
+    [split_lip_riv_main],
+    [fjöldi_leka_main],
+    [postop_dol_main],
+    [postop_mp_main],
+]
+
+# Keep concurrent writes against the cluster modest
+MAX_WORKERS = 3
+
+def run_chain(chain):
+    for migration in chain:
+        migration()
+
+def main():
+    try:
+        # Connect once up front so worker threads share a ready client
+        get_client()
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            list(executor.map(run_chain, MIGRATION_CHAINS))
+    finally:
+        close_client()
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,21 @@
 # test_backend.py
-try:
-    from flask import Flask
-    from flask_cors import CORS
-    from pymongo import MongoClient
-    from marshmallow import Schema
-    from dotenv import load_dotenv
-    print("✅ Todas las dependencias importadas correctamente")
-    
-    app = Flask(__name__)
-    print("✅ Flask funcionando")
-    
-    @app.route('/test')
-    def test():
-        return {'message': 'Backend funcionando correctamente'}
-    
-    if __name__ == '__main__':
-        print("🚀 Iniciando servidor de prueba en http://localhost:5000/test")
-        app.run(debug=True, port=5000)
-        
-except ImportError as e:
-    print(f"❌ Error importando: {e}")
\ No newline at end of file
+# Servir con: gunicorn -w 4 test_backend:app
+# Servidor de desarrollo: FLASK_DEBUG=1 python test_backend.py
+import os
+from flask import Flask
+from flask_cors import CORS
+from pymongo import MongoClient
+from marshmallow import Schema
+from dotenv import load_dotenv
+print("✅ Todas las dependencias importadas correctamente")
+
+app = Flask(__name__)
+print("✅ Flask funcionando")
+
+@app.route('/test')
+def test():
+    return {'message': 'Backend funcionando correctamente'}
+
+if __name__ == '__main__' and os.getenv('FLASK_DEBUG'):
+    print("🚀 Iniciando servidor de prueba en http://localhost:5000/test")
+    app.run(debug=True, port=5000)
\ No newline at end of file